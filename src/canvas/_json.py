@@ -0,0 +1,42 @@
+from __future__ import annotations
+
+import json
+import mmap
+from typing import Any
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover
+    orjson = None  # type: ignore[assignment]
+
+
+def dumps(data: Any) -> bytes:
+    if orjson is not None:
+        return orjson.dumps(data)
+    return json.dumps(data, ensure_ascii=False, separators=(",", ":")).encode("utf8")
+
+
+def loads(raw: bytes) -> Any:
+    if orjson is not None:
+        return orjson.loads(raw)
+    return json.loads(raw)
+
+
+def load_path(filename: Any) -> Any:
+    """Parse a JSON file straight from an mmap, avoiding the extra
+    bytes copy of open().read(); empty files fall back to a plain read."""
+    with open(filename, "rb") as f:
+        try:
+            mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:  # cannot mmap an empty file
+            return loads(f.read())
+        try:
+            if orjson is not None:
+                view = memoryview(mm)
+                try:
+                    return orjson.loads(view)
+                finally:
+                    view.release()
+            return json.loads(bytes(mm))
+        finally:
+            mm.close()
@@ -0,0 +1,36 @@
+from __future__ import annotations
+
+from functools import lru_cache
+
+from canvasapi.course import Course  # type: ignore
+
+
+def get_canvas_files(course: Course) -> dict:  # type: ignore
+    prefixes = {
+        folder.id: folder.full_name.removeprefix("course files") + "/"
+        for folder in course.get_folders()
+    }
+    return {
+        prefixes[file.folder_id] + file.display_name: file.id
+        for file in course.get_files()
+    }
+
+
+@lru_cache(maxsize=1024)
+def get_canvas_assignment_group_name(  # type: ignore
+    course: Course, group_id: int
+) -> str:
+    name: str = course.get_assignment_group(group_id).name
+    return name
+
+
+def get_canvas_assignments(course: Course) -> dict:  # type: ignore
+    return {
+        f"{get_canvas_assignment_group_name(course, assgn.assignment_group_id)}"
+        f"/{assgn.name}": assgn.id
+        for assgn in course.get_assignments()
+    }
+
+
+def get_canvas_quizzes(course: Course) -> dict:  # type: ignore
+    return {quize.title: quize.id for quize in course.get_quizzes()}
@@ -1,52 +1,93 @@
 from __future__ import annotations
 
-import json
 import logging
 import os
+from concurrent.futures import ThreadPoolExecutor
 from contextlib import contextmanager
-from functools import lru_cache, partial, wraps
+from functools import wraps
 from typing import Any, Callable, Generator
 
 from canvasapi.course import Course  # type: ignore
 
+from canvas import _json
+from canvas._queries import (  # noqa: F401  -- re-exported for back compat
+    get_canvas_assignment_group_name as get_canvas_assignment_group_name,
+)
+from canvas._queries import get_canvas_assignments as get_canvas_assignments
+from canvas._queries import get_canvas_files as get_canvas_files
+from canvas._queries import get_canvas_quizzes as get_canvas_quizzes
+
 logger = logging.getLogger("canvas")
 
 
+class _DirtyDict(dict):
+    """dict that remembers whether it was modified since loading."""
+
+    dirty = False
+
+    def __setitem__(self, key: Any, value: Any) -> None:
+        self.dirty = True
+        super().__setitem__(key, value)
+
+    def __delitem__(self, key: Any) -> None:
+        self.dirty = True
+        super().__delitem__(key)
+
+    def update(self, *args: Any, **kwargs: Any) -> None:
+        self.dirty = True
+        super().update(*args, **kwargs)
+
+    def setdefault(self, key: Any, default: Any = None) -> Any:
+        self.dirty = True
+        return super().setdefault(key, default)
+
+    def pop(self, *args: Any) -> Any:
+        self.dirty = True
+        return super().pop(*args)
+
+    def clear(self) -> None:
+        self.dirty = True
+        super().clear()
+
+
 class LazyDict:
     def __init__(self, filename: str) -> None:
         self._filename = filename
 
     def _load(self) -> dict:
         logger.info("loading %s from %s", self._name, self._filename)
-        if os.path.exists(self._filename):
-            with open(self._filename) as f:
-                data = json.load(f)
+        try:
+            with open(self._filename, "rb") as f:
+                data = _json.loads(f.read())
                 assert isinstance(data, dict)
-        else:
+        except FileNotFoundError:
             data = {}
-        return data  # type: ignore
-
-    def __get__(self, instance: Any, owner: Any = None) -> dict:
-        logger.info("getting: %s", self._name)
-        instance_dict = instance.__dict__
-        if self._name not in instance_dict:
-            instance_dict[self._name] = self._load()
-        return instance_dict[self._name]  # type: ignore
+        return _DirtyDict(data)
 
-    def __set__(self, instance: Any, value: dict) -> None:
-        logger.info("setting %s", self._name)
-        instance.__dict__[self._name] = value
+    def __get__(self, instance: Any, owner: Any = None) -> Any:
+        # Non-data descriptor: the loaded dict is stored under the public
+        # name, so every later access skips the descriptor protocol.
+        if instance is None:
+            return self
+        data = self._load()
+        instance.__dict__[self._name] = data
+        return data
 
     def __set_name__(self, owner: type, name: str) -> None:
-        self._name = f"_{name}"
+        self._name = name
         owner._fields.append(name)  # type: ignore
 
     def _save(self, instance: Any) -> None:
         if self._name in instance.__dict__:
             data = instance.__dict__.get(self._name)
+            # plain dicts (set through update) have no dirty flag: save them
+            if not getattr(data, "dirty", True):
+                return
             logger.info("saving LazyDict(%s)", self._name)
-            with open(self._filename, "w") as f:
-                json.dump(data, f)
+            tmp = f"{self._filename}.tmp"
+            with open(tmp, "wb") as f:
+                f.write(_json.dumps(data))
+            os.replace(tmp, self._filename)
 
     def _reset(self, instance: Any) -> None:
         if self._name in instance.__dict__:
@@ -60,25 +101,41 @@ class CanvasFS:
     quizzes = LazyDict("./.quizzes.json")
     _fields: list[str] = []
 
+    def __init__(self) -> None:
+        cls = type(self)
+        self._descriptors = [(name, cls.__dict__[name]) for name in self._fields]
+        self._resolve_cache: dict[tuple[str, str], int] = {}
+
     def _apply(self, fun: Callable) -> None:
-        for name in self._fields:
-            fun(type(self).__dict__[name], name)
+        for name, obj in self._descriptors:
+            fun(obj, name)
 
     def save_state(self) -> None:
-        self._apply(lambda obj, name: obj._save(self))
+        with ThreadPoolExecutor(max_workers=len(self._descriptors) or 1) as executor:
+            futures = [
+                executor.submit(obj._save, self) for _, obj in self._descriptors
+            ]
+        for future in futures:
+            future.result()
 
     def update(self, **kwargs: dict) -> None:
         def update(obj: LazyDict, name: str) -> None:
             if name in kwargs and isinstance(kwargs[name], dict):
-                obj.__set__(self, kwargs[name])
+                self.__dict__[name] = kwargs[name]
 
         self._apply(update)
+        self._resolve_cache.clear()
 
     def reset(self) -> None:
         self._apply(lambda obj, name: obj._reset(self))
+        self._resolve_cache.clear()
 
     def resolve(self, ptype: str, path: str) -> int:
-        idx: int = getattr(self, ptype)[path]
+        key = (ptype, path)
+        idx = self._resolve_cache.get(key)
+        if idx is None:
+            idx = getattr(self, ptype)[path]
+            self._resolve_cache[key] = idx
         return idx
 
 
@@ -101,43 +158,6 @@ def canvasfs(path: str = ".") -> Generator:
         os.chdir(cwd)
 
 
-def get_canvas_files(course: Course) -> dict:  # type: ignore
-    data = {}
-    for folder in course.get_folders():
-        if folder.files_count > 0:
-            folder_name = folder.full_name.replace("course files", "")
-            for file in folder.get_files():
-                data[f"{folder_name}/{file.display_name}"] = file.id
-
-    return data
-
-
-def get_canvas_assignment_group_name(  # type: ignore
-    course: Course, group_id: int
-) -> str:
-    name: str = course.get_assignment_group(group_id).name
-    return name
-
-
-def get_canvas_assignments(course: Course) -> dict:  # type: ignore
-    data = {}
-    get_group_name = lru_cache()(partial(get_canvas_assignment_group_name, course))
-
-    for assgn in course.get_assignments():
-        idx = f"{get_group_name(group_id=assgn.assignment_group_id)}/{assgn.name}"
-        data[idx] = assgn.id
-
-    return data
-
-
-def get_canvas_quizzes(course: Course) -> dict:  # type: ignore
-    data = {}
-    for quize in course.get_quizzes():
-        data[quize.title] = quize.id
-
-    return data
-
-
 def result_to_canvasfs(
     which: str, key_fn: Callable, id_fn: Callable = lambda value: value["id"]
 ) -> Callable:
@@ -148,7 +168,9 @@ def result_to_canvasfs(
             value = f(*args, **kwargs)
             ld = getattr(cfs[-1], which)
             ld[idx] = id_fn(value)
-            logger.info("result_to_canvas_wrapper: canvasfs.%s", which)
+            cfs[-1]._resolve_cache.pop((which, idx), None)
+            if logger.isEnabledFor(logging.INFO):
+                logger.info("result_to_canvas_wrapper: canvasfs.%s", which)
             return value
 
         return g
@@ -161,6 +183,11 @@ def update_canvasfs(course: Course) -> None:  # type: ignore
         raise IndexError(
             "update_canvasfs must be used within `with canvasfs(): ` context"
         )
-    cfs[-1].files = get_canvas_files(course)
-    cfs[-1].assignments = get_canvas_assignments(course)
-    cfs[-1].quizzes = get_canvas_quizzes(course)
+    getters = (
+        ("files", get_canvas_files),
+        ("assignments", get_canvas_assignments),
+        ("quizzes", get_canvas_quizzes),
+    )
+    with ThreadPoolExecutor(max_workers=len(getters)) as executor:
+        futures = {name: executor.submit(fun, course) for name, fun in getters}
+        cfs[-1].update(**{name: future.result() for name, future in futures.items()})
@@ -1,5 +1,6 @@
 import itertools
 import random
+from concurrent.futures import ThreadPoolExecutor
 from typing import Any, Callable, Dict, Generator, Iterator, List, Union
 
 import canvasapi  # type: ignore
@@ -19,12 +20,12 @@ def add_title(feladatok: Union[List[str], str]) -> Dict:
 
 
 def split(x: List, n: int) -> Iterator[List]:
-    s: float = 0
-    delta: float = len(x) / n
-    for _ in range(1, n + 1):
-        i, j = round(s), round(s + delta)
-        yield (x[i:j])
-        s += delta
+    size, rest = divmod(len(x), n)
+    i = 0
+    for k in range(n):
+        j = i + size + (k < rest)
+        yield x[i:j]
+        i = j
 
 
 def get_students(course: canvasapi.course.Course, filter_fun: Callable = lambda x: True) -> List:  # type: ignore
@@ -46,28 +47,37 @@ def add_visibility(exs: List[dict], students: List) -> List[dict]:
     return exs
 
 
-def confirm_delete(exs: List, callback: Callable) -> None:
+def _confirm_iter(
+    exs: List, callback: Callable, w0: Any, out: Any
+) -> Generator[None, str, None]:
     prompt = "Do you really want to delete `{fname}`?"
+    remaining = iter(exs)
+    for ex in remaining:
+        w0.description = prompt.format(fname=ex.name)
+        ans = yield
+        ans = ans.lower()
+        if ans == "yes":
+            with out:
+                callback(ex)
+        elif ans == "yes to all":
+            with out:
+                with ThreadPoolExecutor(max_workers=8) as executor:
+                    list(executor.map(callback, itertools.chain([ex], remaining)))
+            break
+    w0.close()
+
+
+def confirm_delete(exs: List, callback: Callable) -> None:
     style = {"description_width": "initial"}
     w0 = widgets.ToggleButtons(
-        options=["No", "Yes"],
+        options=["No", "Yes", "Yes to all"],
         description="",
         disabled=False,
         button_style="primary",
         style=style,
     )
     out = widgets.Output()
-
-    def iter_fn() -> Generator[None, str, None]:
-        for ex in exs:
-            w0.description = prompt.format(fname=ex.name)
-            ans = yield
-            if ans.lower() == "yes":
-                with out:
-                    callback(ex)
-        w0.close()
-
-    ex_iter = iter_fn()
+    ex_iter = _confirm_iter(exs, callback, w0, out)
 
     def widget_cb(w: widgets.widgets, c: Dict, b: Any) -> None:  # type: ignore
         if c.get("event", "") == "click":
@@ -96,12 +106,18 @@ def del_assignments(course: canvasapi.course.Course, title: str) -> None:  # typ
 
 
 def publish_assignments(course: canvasapi.course.Course, title: str, exclude: Union[str, None] = None) -> None:  # type: ignore
-    for x in course.get_assignments(search_term=title):
-        if exclude is not None and x.name.startswith(exclude):
-            continue
+    def publish(x: canvasapi.assignment.Assignment) -> None:  # type: ignore
         print(f"publishing {x.name}, {x.id} ")
         x.edit(assignment={"published": True})
 
+    to_publish = [
+        x
+        for x in course.get_assignments(search_term=title)
+        if exclude is None or not x.name.startswith(exclude)
+    ]
+    with ThreadPoolExecutor(max_workers=8) as executor:
+        list(executor.map(publish, to_publish))
+
 
 __all__ = [
     "mk_fel",
@@ -2,12 +2,18 @@ from __future__ import annotations
 
 import logging
 import os
-from functools import lru_cache, partial
-from tempfile import TemporaryDirectory
+from concurrent.futures import ThreadPoolExecutor
 from typing import Any, Callable
 
 from canvasapi.course import Course as Course  # type: ignore
 
+from canvas._queries import (  # noqa: F401  -- re-exported for back compat
+    get_canvas_assignment_group_name as get_canvas_assignment_group_name,
+)
+from canvas._queries import get_canvas_assignments as get_canvas_assignments
+from canvas._queries import get_canvas_files as get_canvas_files
+from canvas._queries import get_canvas_quizzes as get_canvas_quizzes
+from canvas.files import _get_upload_tmp
 from canvas.saveddict import SavedDict as SavedDict
 
 logger = logging.getLogger("canvas")
@@ -33,66 +39,35 @@ def upload_file(course: Course, local_file: str, canvas_file: str) -> Any:  # ty
     local_file = os.path.abspath(local_file)
     canvas_dir, canvas_name = os.path.split(canvas_file)
 
-    with TemporaryDirectory() as tmp:
-        tmp_path = f"{tmp}/{canvas_name}"
-        os.symlink(local_file, tmp_path)
+    tmp_path = f"{_get_upload_tmp()}/{canvas_name}"
+    os.symlink(local_file, tmp_path)
+    try:
         success, file = course.upload(
             tmp_path, parent_folder_path=canvas_dir, on_duplicate="overwrite"
         )
+    finally:
+        os.unlink(tmp_path)
     if success:
         fsdata = course.get_fsdata()
         files = fsdata.setdefault("files", {})
-        files[canvas_file] = file["id"]
+        # same leading-slash key format that get_canvas_files generates
+        files["/" + canvas_file.lstrip("/")] = file["id"]
     return file
 
 
-def get_canvas_files(course: Course) -> dict:  # type: ignore
-    data = {}
-    for folder in course.get_folders():
-        if folder.files_count > 0:
-            folder_name = folder.full_name
-            folder_name = folder_name.replace("course files/", "")
-            folder_name = folder_name.replace("course files", "")
-            for file in folder.get_files():
-                data[f"{folder_name}/{file.display_name}"] = file.id
-
-    return data
-
-
-def get_canvas_assignment_group_name(  # type: ignore
-    course: Course, group_id: int
-) -> str:
-    name: str = course.get_assignment_group(group_id).name
-    return name
-
-
-def get_canvas_assignments(course: Course) -> dict:  # type: ignore
-    data: dict = {}
-    get_group_name = lru_cache()(partial(get_canvas_assignment_group_name, course))
-
-    for assgn in course.get_assignments():
-        idx = f"{get_group_name(group_id=assgn.assignment_group_id)}/{assgn.name}"
-        data.setdefault(idx, []).append(assgn.id)
-
-    return data
-
-
-def get_canvas_quizzes(course: Course) -> dict:  # type: ignore
-    data = {}
-    for quize in course.get_quizzes():
-        data[quize.title] = quize.id
-
-    return data
-
-
 @add_to_course
 def fsdata_from_canvas(course: Course, which=("files", "assignments", "quizzes")) -> None:  # type: ignore
+    getters = {
+        "files": get_canvas_files,
+        "assignments": get_canvas_assignments,
+        "quizzes": get_canvas_quizzes,
+    }
+    which = [name for name in which if name in getters]
     if len(which) > 0:
         fsdata = course.get_fsdata()
-        if "files" in which:
-            fsdata.update({"files": get_canvas_files(course)})
-        if "assignments" in which:
-            fsdata.update({"assignments": get_canvas_assignments(course)})
-        if "quizzes" in which:
-            fsdata.update({"assignments": get_canvas_quizzes(course)})
+        with ThreadPoolExecutor(max_workers=len(which)) as executor:
+            futures = {name: executor.submit(getters[name], course) for name in which}
+            fsdata.update(
+                {name: future.result() for name, future in futures.items()}
+            )
         fsdata.save()
@@ -1,15 +1,30 @@
+import atexit
 import os
+import shutil
 import tempfile
-from typing import Dict, Tuple
+from collections import deque
+from typing import Dict, Optional, Tuple
 
 import canvasapi  # type: ignore
 
+_upload_tmp: Optional[str] = None
+
+
+def _get_upload_tmp() -> str:
+    """One temporary directory per process for the upload symlinks,
+    cleaned up at exit instead of per upload."""
+    global _upload_tmp
+    if _upload_tmp is None:
+        _upload_tmp = tempfile.mkdtemp(prefix="canvas-upload-")
+        atexit.register(shutil.rmtree, _upload_tmp, ignore_errors=True)
+    return _upload_tmp
+
 
 def get_canvas_folder(  # type: ignore
     course: canvasapi.course.Course, path: str
 ) -> canvasapi.folder.Folder:
     try:
-        folder = list(course.resolve_path(path))[-1]
+        folder = deque(course.resolve_path(path), maxlen=1)[0]
     except canvasapi.exceptions.ResourceDoesNotExist:
         parent_path, name = os.path.split(path)
         folder = course.create_folder(name, parent_folder_path=parent_path)
@@ -37,10 +52,11 @@ def upload_file(  # type: ignore
     canvas_folder = get_canvas_folder(course, canvas_dir)
 
     result: dict
-    with tempfile.TemporaryDirectory() as tmp:
-        tmp_path = f"{tmp}/{canvas_name}"
-        local_path = f"{local_dir}/{local_name}"
-        os.symlink(local_path, tmp_path)
+    tmp_path = f"{_get_upload_tmp()}/{canvas_name}"
+    os.symlink(f"{local_dir}/{local_name}", tmp_path)
+    try:
         succes, result = canvas_folder.upload(tmp_path, on_duplicate="overwrite")
+    finally:
+        os.unlink(tmp_path)
 
     return result
@@ -1,28 +1,93 @@
 import functools
+import hashlib
 import logging
 import os
+import re
+import shutil
 import subprocess
-from typing import Any, Iterator, List, Tuple
+import threading
+import uuid
+from typing import Any, Iterator, List, Optional, Tuple
 
 logger = logging.getLogger("canvas")
 
+# one random separator per process: cannot collide with document content
+_PANDOC_SEP = f"sep{uuid.uuid4().hex[:16]}"
+
+# conversion results are cached on disk keyed by (command, input) hash;
+# set to False to force pandoc to run on every call
+cache_enabled = True
+_CACHE_DIR = os.path.expanduser("~/.cache/canvas/pandoc")
+
+
+def _cache_path(cmd: Any, text: str) -> str:
+    digest = hashlib.sha256(f"{cmd}\0{text}".encode("utf8")).hexdigest()
+    return f"{_CACHE_DIR}/{digest[:2]}/{digest[2:]}"
+
 
 def all_app_in_path(app_name: str) -> Iterator[str]:
-    for d in os.environ["PATH"].split(":") + [f"{os.getenv('HOME')}/local/bin"]:
-        p = f"{d}{os.path.sep}{app_name}"
-        if os.path.exists(p):
+    dirs = os.environ["PATH"].split(os.pathsep) + [f"{os.getenv('HOME')}/local/bin"]
+    for d in dirs:
+        p = shutil.which(app_name, path=d)
+        if p is not None:
             yield p
 
 
+_VERSION_RE = re.compile(r"\d+(?:\.\d+)+")
+_version_cache: dict = {}
+
+
 def get_app_version(app: str) -> Tuple[int, ...]:
-    res = subprocess.run(app + " --version", shell=True, stdout=subprocess.PIPE)
-    return tuple(
-        map(int, res.stdout.decode("utf-8").split("\n")[0].split()[1].split("."))
-    )
+    try:
+        mtime = os.stat(app).st_mtime_ns
+    except OSError:
+        mtime = -1
+    key = (app, mtime)
+    version = _version_cache.get(key)
+    if version is None:
+        res = subprocess.run(
+            [app, "--version"], stdout=subprocess.PIPE, stderr=subprocess.DEVNULL
+        )
+        first_line = res.stdout.decode("utf-8").split("\n", 1)[0]
+        match = _VERSION_RE.search(first_line)
+        version = tuple(map(int, match.group().split("."))) if match else ()
+        _version_cache[key] = version
+    return version
+
+
+# the chosen pandoc path survives interpreter restarts here, validated
+# against the binary's mtime so upgrades trigger a rescan
+_PANDOC_PATH_CACHE = os.path.expanduser("~/.cache/canvas/pandoc_path")
 
 
 @functools.lru_cache()
 def pandoc_cmd() -> str:
+    try:
+        with open(_PANDOC_PATH_CACHE) as f:
+            path, mtime = f.read().splitlines()[:2]
+        if os.stat(path).st_mtime_ns == int(mtime):
+            return path
+    except (OSError, ValueError):
+        pass
+    path = _find_pandoc()
+    try:
+        os.makedirs(os.path.dirname(_PANDOC_PATH_CACHE), exist_ok=True)
+        tmp = f"{_PANDOC_PATH_CACHE}.{os.getpid()}.tmp"
+        with open(tmp, "w") as f:
+            f.write(f"{path}\n{os.stat(path).st_mtime_ns}\n")
+        os.replace(tmp, _PANDOC_PATH_CACHE)
+    except OSError:
+        pass
+    return path
+
+
+def _find_pandoc() -> str:
+    if not os.environ.get("CANVAS_PANDOC_PICK_NEWEST"):
+        path = shutil.which("pandoc")
+        if path is not None and get_app_version(path) >= (2,):
+            return path
+
+    # scan the whole PATH and pick the newest candidate
     pandoc = sorted(
         ((get_app_version(p), p) for p in all_app_in_path("pandoc")), reverse=True
     )
@@ -30,57 +95,203 @@ def pandoc_cmd() -> str:
         raise FileNotFoundError("pandoc not found")
 
     version, path = pandoc[0]
-    if version[0] < 2:
+    if version < (2,):
         raise FileNotFoundError(
             f'only too old pandoc version ({".".join(map(str,version))}) found: {path}'
         )
     return path
 
 
-def run_cmd_on_text(cmd: str, text: str, out_encoding: str = "utf-8") -> str:
-    proc = subprocess.run(
-        cmd,
-        shell=True,
-        input=text.encode("utf8"),
-        capture_output=True,
-    )
-    if proc.returncode != 0:
-        logger.error(cmd)
-        logger.error(proc.stderr.decode(out_encoding))
+def run_cmd_on_text(
+    cmd: List[List[str]],
+    text: str,
+    out_encoding: str = "utf-8",
+    timeout: Optional[float] = None,
+) -> str:
+    if not cache_enabled:
+        return _run_cmd_on_text(cmd, text, out_encoding, timeout)
+
+    path = _cache_path(cmd, text)
+    try:
+        with open(path, encoding=out_encoding) as f:
+            return f.read()
+    except FileNotFoundError:
+        pass
+    out = _run_cmd_on_text(cmd, text, out_encoding, timeout)
+    if out:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp = f"{path}.{os.getpid()}.tmp"
+        with open(tmp, "w", encoding=out_encoding) as f:
+            f.write(out)
+        os.replace(tmp, path)
+    return out
+
+
+_PIPE_CHUNK = 65536
+
+
+def _feed(stream: Any, data: bytes) -> None:
+    view = memoryview(data)
+    try:
+        for i in range(0, len(view), _PIPE_CHUNK):
+            stream.write(view[i : i + _PIPE_CHUNK])
+    except BrokenPipeError:
+        pass
+    finally:
+        stream.close()
+
+
+def _drain(stream: Any, sink: List[bytes], i: int) -> None:
+    sink[i] = stream.read()
+
+
+def _spawn(cmd: List[List[str]]) -> List["subprocess.Popen[bytes]"]:
+    procs: List[subprocess.Popen[bytes]] = []
+    for argv in cmd:
+        procs.append(
+            subprocess.Popen(
+                argv,
+                stdin=procs[-1].stdout if procs else subprocess.PIPE,
+                stdout=subprocess.PIPE,
+                stderr=subprocess.PIPE,
+                bufsize=_PIPE_CHUNK,
+            )
+        )
+        if len(procs) > 1:
+            procs[-2].stdout.close()  # type: ignore
+    return procs
+
+
+def _kill_all(
+    procs: List["subprocess.Popen[bytes]"], threads: List[threading.Thread]
+) -> None:
+    for p in procs:
+        p.kill()
+    procs[-1].communicate()
+    for p in procs[:-1]:
+        p.wait()
+    for thread in threads:
+        thread.join()
+
+
+def _run_cmd_on_text(
+    cmd: List[List[str]],
+    text: str,
+    out_encoding: str = "utf-8",
+    timeout: Optional[float] = None,
+) -> str:
+    procs = _spawn(cmd)
+    writer = threading.Thread(target=_feed, args=(procs[0].stdin, text.encode("utf8")))
+    # the stderr of the earlier stages must be drained while they run:
+    # a stage blocking on a full stderr pipe would stall the pipeline
+    errors: List[bytes] = [b""] * (len(procs) - 1)
+    readers = [
+        threading.Thread(target=_drain, args=(p.stderr, errors, i))
+        for i, p in enumerate(procs[:-1])
+    ]
+    for thread in [writer, *readers]:
+        thread.start()
+    try:
+        out, err = procs[-1].communicate(timeout=timeout)
+    except subprocess.TimeoutExpired:
+        _kill_all(procs, [writer, *readers])
+        logger.error("%s timed out after %s seconds", cmd, timeout)
+        return ""
+    for thread in [writer, *readers]:
+        thread.join()
+    stderr = b"".join(errors + [err])
+    if any(p.wait() != 0 for p in procs):
+        logger.error("%s", cmd)
+        logger.error(stderr.decode(out_encoding))
         return ""
-    if proc.stderr:
-        logger.warning(cmd)
-        logger.warning(proc.stderr.decode(out_encoding))
-    return proc.stdout.decode(out_encoding)
+    if stderr:
+        logger.warning("%s", cmd)
+        logger.warning(stderr.decode(out_encoding))
+    return out.decode(out_encoding)
 
 
-def pandoc_cmd_with_options(**kwargs: Any) -> str:
+@functools.lru_cache(maxsize=64)
+def _make_cmd(
+    src_format: str,
+    out_format: str,
+    filters: Tuple[str, ...],
+    options: Tuple[str, ...],
+    math: str,
+) -> Tuple[Tuple[str, ...], ...]:
+    pandoc = [
+        pandoc_cmd(),
+        "-f",
+        src_format,
+        "-t",
+        out_format,
+        *math.split(),
+        *(token for option in options for token in option.split()),
+    ]
+    for filter_name in filters:
+        pandoc += ["-L", filter_name]
+
+    # bound the pandoc heap so a pathological document cannot OOM the build
+    heap = os.environ.get("CANVAS_PANDOC_HEAP", "512M")
+    if heap:
+        pandoc += ["+RTS", f"-M{heap}", "-RTS"]
+
+    return (("lua", "-l", "expand-macros"), tuple(pandoc))
+
+
+def pandoc_cmd_with_options(**kwargs: Any) -> List[List[str]]:
     options = {
         "src_format": "markdown",
         "out_format": "html",
         "filters": ["href.lua"],
-        "options": ["--mathml"],
+        "options": [],
+        "math": "--mathml",
     }
 
     options["options"].extend(kwargs.pop("options", []))  # type: ignore
     options.update(kwargs)
 
-    filters = " ".join(f"-L {filter_name}" for filter_name in options["filters"])
-
-    cmd_line_options = (
-        f"-f {options['src_format']} -t {options['out_format']} "
-        f"{' '.join(options['options'])} {filters}"
+    cmd = _make_cmd(
+        options["src_format"],
+        options["out_format"],
+        tuple(options["filters"]),
+        tuple(options["options"]),
+        options["math"],
     )
-
-    return f"lua -l expand-macros| {pandoc_cmd()} {cmd_line_options}"
+    return [list(argv) for argv in cmd]
 
 
 def pandoc_with_options(text: str, **kwargs: Any) -> str:
+    timeout = kwargs.pop("timeout", None)
+    # math rendering and the link filter cost pandoc/Lua startup time;
+    # a quick scan of the input lets us drop them when they cannot matter
+    if "$" not in text and "\\(" not in text and "\\[" not in text:
+        kwargs.setdefault("math", "")
+    if "](" not in text:
+        kwargs.setdefault("filters", [])
     cmd = pandoc_cmd_with_options(**kwargs)
-    return run_cmd_on_text(cmd, text)
+    return run_cmd_on_text(cmd, text, timeout=timeout)
+
+
+def _passthrough(txt: str, src_format: str, out_format: str) -> bool:
+    """True when a pandoc run cannot change the item: empty input, or
+    HTML input going to an HTML output. Markdown (the default) is never
+    skipped: a `<`-prefixed item may still hold autolinks or markdown
+    inside inline HTML, both of which pandoc transforms."""
+    stripped = txt.strip()
+    if not stripped:
+        return True
+    return (
+        stripped.startswith("<")
+        and src_format.startswith("html")
+        and out_format in ("html", "html5")
+    )
 
 
 def pandoc_text(txt: str, src_format: str = "", out_format: str = "html") -> str:
+    if not txt.strip():
+        return ""
+    if _passthrough(txt, src_format, out_format):
+        return txt
     cmd = pandoc_cmd_with_options(
         src_format=src_format,
         out_format=out_format,
@@ -93,7 +304,14 @@ def pandoc_list(
     src_format: str = "",
     out_format: str = "html",
 ) -> List[str]:
-    sep = "0123456789abcdefghijklmnopqrstuvwxyz"
-    txt = f"\n\n{sep}\n\n".join(lst)
-    html = pandoc_text(txt, src_format, out_format).split(f"\n<p>{sep}</p>\n")
-    return html
+    result = [txt if txt.strip() else "" for txt in lst]
+    todo = [
+        i for i, txt in enumerate(lst) if not _passthrough(txt, src_format, out_format)
+    ]
+    if todo:
+        sep = _PANDOC_SEP
+        txt = f"\n\n{sep}\n\n".join(lst[i] for i in todo)
+        html = pandoc_text(txt, src_format, out_format).split(f"\n<p>{sep}</p>\n")
+        for i, converted in zip(todo, html):
+            result[i] = converted
+    return result
@@ -1,14 +1,25 @@
 from __future__ import annotations
 
-import json
+import copy
 import os
-from typing import Any
+from pathlib import Path
+from typing import Any, ClassVar
+
+from canvas import _json
 
 
 class SavedDict(dict):
-    def __init__(self, filename: str, default: dict | None = None):
-        self._filename = os.path.abspath(filename)
+    # parsed file contents shared between instances, keyed by
+    # (filename, mtime_ns, size); entries go stale with the file itself
+    _parsed_cache: ClassVar[dict] = {}
+
+    def __init__(self, filename: str | os.PathLike, default: dict | None = None):
+        # .absolute() rather than .resolve(): the repr must show the
+        # path as given, not the symlink-free variant
+        self._filename = Path(filename).absolute()
+        self._repr = f'{type(self).__name__}("{self._filename}")'
         self._needinit = True
+        self._dirty = False
         self._default = default if default is not None else {}
 
     def __getitem__(self, key: Any) -> Any:
@@ -19,43 +30,99 @@ class SavedDict(dict):
     def __setitem__(self, key: Any, value: Any) -> None:
         if self._needinit:
             self.load()
+        self._dirty = True
         return super().__setitem__(key, value)
 
+    def setdefault(self, key: Any, default: Any = None) -> Any:
+        if self._needinit:
+            self.load()
+        # conservative: the returned value may be mutated by the caller
+        self._dirty = True
+        return super().setdefault(key, default)
+
+    def pop(self, *args: Any) -> Any:
+        if self._needinit:
+            self.load()
+        self._dirty = True
+        return super().pop(*args)
+
     def load(self, data: dict | None = None) -> SavedDict:
+        # anything not coming from the file itself still needs a save
+        dirty = True
         if data is None:
-            if os.path.exists(self._filename):
-                with open(self._filename) as f:
-                    data = json.load(f)
-            else:
+            try:
+                st = os.stat(self._filename)
+            except FileNotFoundError:
                 data = self._default
+            else:
+                key = (self._filename, st.st_mtime_ns, st.st_size)
+                cached = SavedDict._parsed_cache.get(key)
+                if cached is None:
+                    cached = _json.load_path(self._filename)
+                    SavedDict._parsed_cache[key] = cached
+                data = copy.deepcopy(cached)
+                dirty = False
         super().__init__(data)
         self._needinit = False
+        self._dirty = dirty
+        self.__class__ = _LoadedSavedDict
         return self
 
     def __repr__(self) -> str:
         if self._needinit:
-            return f'{type(self).__name__}("{self._filename}")'
+            return self._repr
         else:
             return super().__repr__()
 
     def save(self) -> None:
-        if not self._needinit:
-            with open(self._filename, "w") as f:
-                json.dump(self, f)
+        if self._needinit or not self._dirty:
+            return
+        tmp = f"{self._filename}.tmp"
+        with open(tmp, "wb") as f:
+            f.write(_json.dumps(self))
+        os.replace(tmp, self._filename)
+        self._dirty = False
+        for key in [k for k in SavedDict._parsed_cache if k[0] == self._filename]:
+            del SavedDict._parsed_cache[key]
 
     def reset(self) -> None:
         self._needinit = True
+        self.__class__ = SavedDict
         self.clear()
 
+    def save_and_clear(self) -> None:
+        """Persist and drop the in-memory contents in one step — the
+        shutdown-path shorthand for save() followed by reset()."""
+        self.save()
+        self.reset()
+
     def update(self, other: dict) -> None:  # type: ignore
         if self._needinit:
             self.load()
+        if other:
+            self._dirty = True
         rec_update(self, other)
 
 
+class _LoadedSavedDict(SavedDict):
+    """A loaded SavedDict: the `_needinit` gates are no longer needed,
+    so item access falls through to the plain dict methods."""
+
+    __getitem__ = dict.__getitem__
+    __repr__ = dict.__repr__
+
+    def __setitem__(self, key: Any, value: Any) -> None:
+        self._dirty = True
+        dict.__setitem__(self, key, value)
+
+
 def rec_update(self: dict, other: dict) -> None:
-    for key, value in other.items():
-        if (key in self) and isinstance(self[key], dict) and isinstance(value, dict):
-            rec_update(self[key], value)
-        else:
-            self[key] = value
+    stack = [(self, other)]
+    while stack:
+        dst, src = stack.pop()
+        for key, value in src.items():
+            current = dst.get(key)
+            if isinstance(current, dict) and isinstance(value, dict):
+                stack.append((current, value))
+            else:
+                dst[key] = value
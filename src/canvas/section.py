@@ -1,19 +1,36 @@
 import datetime
+import functools
+import os
 import re
 import unicodedata
+from concurrent.futures import ThreadPoolExecutor
 from dataclasses import dataclass
 from typing import Any, List, Optional, Tuple
 
 import yaml  # type: ignore
+
+try:  # the libyaml-backed classes parse/emit several times faster
+    from yaml import CSafeDumper as _YamlDumper
+    from yaml import CSafeLoader as _YamlLoader
+except ImportError:
+    from yaml import SafeDumper as _YamlDumper
+    from yaml import SafeLoader as _YamlLoader
+
 from canvasapi.course import Course  # type: ignore
-from jinja2 import sandbox
+from jinja2 import Template, sandbox
 
 from canvas.pandoc import pandoc_with_options
 
+_ENV = sandbox.Environment()
+
+
+@functools.lru_cache(maxsize=64)
+def _compile(template_src: str) -> Template:
+    return _ENV.from_string(template_src)
+
 
 def noaccent(text: str) -> str:
-    btext = unicodedata.normalize("NFKD", text).encode()
-    return bytes(x for x in btext if int(x) < 128).decode("utf8")
+    return unicodedata.normalize("NFKD", text).encode("ascii", "ignore").decode("ascii")
 
 
 vocab = {
@@ -26,10 +43,12 @@ vocab = {
     "feladatok": "exs",
 }
 
+_WS_RE = re.compile(r"\s+")
+
 
+@functools.lru_cache(maxsize=1024)
 def normalize_key(key: str) -> str:
-    key = key.strip()
-    key = re.sub(r"\s+", " ", key)
+    key = _WS_RE.sub(" ", key.strip())
     key = noaccent(key).lower()
     key = vocab.get(key, key)
     return key
@@ -45,35 +64,86 @@ class Header:
     time_slot: str
     template: str
 
+    __slots__ = (
+        "first_section",
+        "last_section",
+        "breaks",
+        "title",
+        "short_name",
+        "time_slot",
+        "template",
+        "exs",
+        "extras",
+    )
+
     def __init__(self, header: dict) -> None:
+        self.extras: dict = {}
         for k, v in header.items():
-            setattr(self, normalize_key(k), v)
+            key = normalize_key(k)
+            if key in Header.__slots__ and key != "extras":
+                setattr(self, key, v)
+            else:
+                self.extras[key] = v
+        if hasattr(self, "breaks"):
+            self.breaks = frozenset(self.breaks)  # type: ignore
+
+    def get(self, attr: str, default: Optional[Any] = None) -> Any:
+        try:
+            return getattr(self, attr)
+        except AttributeError:
+            return self.extras.get(attr, default)
+
+    def __getitem__(self, key: str) -> Any:
+        return self.get(key)
 
     def next_week(self, date: datetime.date) -> Tuple[datetime.date, int]:
         delta = 7 - ((date - self.first_section).days % 7)
         date = datetime.timedelta(days=delta) + date
-        while date in self.breaks:
-            date = datetime.timedelta(days=7) + date
         week = 1 + ((date - self.first_section).days // 7)
+        one_week = datetime.timedelta(days=7)
+        while date in self.breaks:
+            date = one_week + date
+            week += 1
         return date, week
 
 
 class Section:
+    __slots__ = (
+        "date",
+        "serial",
+        "week",
+        "header",
+        "title",
+        "short_name",
+        "time_slot",
+        "exs",
+        "extras",
+    )
+
     def __init__(self, section: dict, header: Header, data: dict):
         self.date = data["date"]
+        self.extras: dict = {}
 
         if section is not None:
             for k, v in section.items():
-                setattr(self, normalize_key(k), v)
+                key = normalize_key(k)
+                if key in Section.__slots__ and key != "extras":
+                    setattr(self, key, v)
+                else:
+                    self.extras[key] = v
 
         self.serial = data["serial"]
         self.week = data["week"]
         self.header = header
 
     def get(self, attr: str, default: Optional[Any] = None) -> Any:
-        if hasattr(self, attr):
+        try:
             return getattr(self, attr)
-        return getattr(self.header, attr, default)
+        except AttributeError:
+            pass
+        if attr in self.extras:
+            return self.extras[attr]
+        return self.header.get(attr, default)
 
     def __getitem__(self, key: str) -> Any:
         return self.get(key)
@@ -82,9 +152,40 @@ class Section:
         return self.header.next_week(self.date)
 
 
+# date objects interned by ISO string: break/holiday dates repeat a lot
+# across section documents
+_DATE_CACHE: dict = {}
+
+
+def _to_date(value: str) -> datetime.date:
+    date = _DATE_CACHE.get(value)
+    if date is None:
+        date = datetime.date.fromisoformat(value)
+        _DATE_CACHE[value] = date
+    return date
+
+
+class _SectionLoader(_YamlLoader):  # type: ignore
+    pass
+
+
+def _construct_timestamp(loader: Any, node: Any) -> Any:
+    if len(node.value) == 10:  # plain yyyy-mm-dd, the only form used here
+        return _to_date(node.value)
+    return loader.construct_yaml_timestamp(node)
+
+
+_SectionLoader.add_constructor("tag:yaml.org,2002:timestamp", _construct_timestamp)
+
+
 def read_section(filename: str) -> Tuple[Header, List[Section]]:
+    return _read_section(filename, os.stat(filename).st_mtime_ns)
+
+
+@functools.lru_cache(maxsize=32)
+def _read_section(filename: str, mtime_ns: int) -> Tuple[Header, List[Section]]:
     with open(filename) as f:
-        lst = yaml.safe_load_all(f)
+        lst = yaml.load_all(f, Loader=_SectionLoader)
         header = Header(next(lst))
         sections = []
         date = header.first_section
@@ -98,18 +199,31 @@ def read_section(filename: str) -> Tuple[Header, List[Section]]:
     return header, sections
 
 
-def add_metablock(course: Course, text: str = "") -> str:  # type: ignore
-    """`text` is a markdown document whitout preamble!
-    A preambule containing coursedata is added.
-    It is used in the `href.lua` filter!
-    """
+# rendered preamble per course.id, invalidated when the metadata changes
+_preamble_cache: dict = {}
+
+
+def _preamble(course: Course) -> str:  # type: ignore
     meta = {
         "coursedata": {
             "base_url": f"{course._requester.original_url}/courses/{course.id}/"
         }
     }
     meta["coursedata"].update(course.get_fsdata())
-    return "---\n".join(["", yaml.dump(meta), text])
+    key = repr(meta)
+    cached = _preamble_cache.get(course.id)
+    if cached is None or cached[0] != key:
+        cached = (key, "---\n".join(["", yaml.dump(meta, Dumper=_YamlDumper), ""]))
+        _preamble_cache[course.id] = cached
+    return cached[1]
+
+
+def add_metablock(course: Course, text: str = "") -> str:  # type: ignore
+    """`text` is a markdown document whitout preamble!
+    A preambule containing coursedata is added.
+    It is used in the `href.lua` filter!
+    """
+    return _preamble(course) + text
 
 
 def pandoc_sections(  # type: ignore
@@ -127,8 +241,7 @@ def pandoc_sections(  # type: ignore
     if until is None:
         until = header.last_section
 
-    env = sandbox.Environment()
-    t = env.from_string(header.template)
+    t = _compile(header.template)
 
     text = t.render(sections=sections, header=header, until=until)
 
@@ -141,3 +254,22 @@ def pandoc_sections(  # type: ignore
     )
 
     return text
+
+
+def pandoc_sections_many(  # type: ignore
+    jobs: List[Tuple[Course, Header, List[Section]]],
+    **kwargs: Any,
+) -> List[str]:
+    """Run `pandoc_sections` for several courses concurrently.
+
+    Each job blocks on its own pandoc subprocess, so the threads overlap
+    the pandoc startup and conversion times of independent documents.
+    """
+    if not jobs:
+        return []
+    with ThreadPoolExecutor(max_workers=min(len(jobs), os.cpu_count() or 1)) as ex:
+        futures = [
+            ex.submit(pandoc_sections, course, header, sections, **kwargs)
+            for course, header, sections in jobs
+        ]
+        return [future.result() for future in futures]
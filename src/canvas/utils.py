@@ -1,7 +1,10 @@
-import json
 import os
-import subprocess
+import queue
 import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
 from datetime import datetime
 from typing import (
     Any,
@@ -11,15 +14,17 @@ from typing import (
     List,
     Optional,
     Sequence,
-    TextIO,
+    Tuple,
     Union,
+    cast,
 )
 
 import canvasapi  # type: ignore
 from tqdm.auto import tqdm  # type: ignore
 from yaml import safe_load as yaml_safe_load  # type: ignore
 
-from canvas.pandoc import pandoc_cmd, pandoc_list, pandoc_text
+from canvas import _json
+from canvas.pandoc import _run_cmd_on_text, pandoc_cmd, pandoc_list
 
 
 def load_dotenv() -> None:
@@ -29,9 +34,7 @@ def load_dotenv() -> None:
 
 
 def read_setting(root: str = ".") -> Any:
-    with open(root + "/canvas.json") as f:
-        setting = json.load(f)
-    return setting
+    return _json.load_path(root + "/canvas.json")
 
 
 def get_canvas_old(setting: Union[None, dict] = None) -> canvasapi.Canvas:  # type: ignore
@@ -52,15 +55,74 @@ def get_canvas() -> canvasapi.Canvas:  # type: ignore
     )
 
 
+@dataclass(frozen=True)
+class LocalData:
+    pdf_canvas: str = ""
+    pdf_local: str = ""
+    index_local: str = ""
+
+    def __getitem__(self, key: str) -> str:
+        return cast(str, getattr(self, key))
+
+
+_LOCAL_DATA_KEYS = ("pdf_canvas", "pdf_local", "index_local")
+
+
 def get_course(  # type: ignore
     config: Dict, course_name: Optional[str] = None
 ) -> canvasapi.course.Course:
     course_data = config if course_name is None else config[course_name]
     course = get_canvas().get_course(course_data["course_id"])
     course.config = course_data
+    if any(k in course_data for k in _LOCAL_DATA_KEYS):
+        course.local_data = LocalData(
+            **{k: course_data[k] for k in _LOCAL_DATA_KEYS if k in course_data}
+        )
     return course
 
 
+# folder/file listings are paginated REST traversals; cache them briefly
+# so one bulk operation does not refetch the same metadata per item
+_CACHE_TTL = 60.0
+_folders_cache: Dict[int, Tuple[float, List]] = {}
+_files_cache: Dict[int, Tuple[float, List]] = {}
+
+
+def _folders_of(course: canvasapi.course.Course) -> List:  # type: ignore
+    cached = _folders_cache.get(course.id)
+    if cached is None or time.monotonic() - cached[0] > _CACHE_TTL:
+        cached = (time.monotonic(), list(course.get_folders()))
+        _folders_cache[course.id] = cached
+    return cached[1]
+
+
+def _files_of(folder: canvasapi.folder.Folder) -> List:  # type: ignore
+    cached = _files_cache.get(folder.id)
+    if cached is None or time.monotonic() - cached[0] > _CACHE_TTL:
+        cached = (time.monotonic(), list(folder.get_files()))
+        _files_cache[folder.id] = cached
+    return cached[1]
+
+
+def clear_canvas_cache() -> None:
+    _folders_cache.clear()
+    _files_cache.clear()
+
+
+def _resolve_folder(  # type: ignore
+    course: canvasapi.course.Course, folder_name: Optional[str]
+) -> canvasapi.folder.Folder:
+    all_folders = _folders_of(course)
+    if folder_name is None:
+        return all_folders[0]
+    folders = [f for f in all_folders if f.name == folder_name]
+    if folders:
+        return folders[0]
+    folder = all_folders[0].create_folder(folder_name)
+    _folders_cache.pop(course.id, None)
+    return folder
+
+
 def upload_pdf(  # type: ignore
     course: canvasapi.course.Course,
     filename: str,
@@ -70,25 +132,15 @@ def upload_pdf(  # type: ignore
 ) -> Optional[canvasapi.file.File]:
     if localdir is None:
         if folder_name is None:
-            folder_name = course.local_data["pdf_canvas"]
-        localdir = course.local_data["pdf_local"]
+            folder_name = course.local_data.pdf_canvas
+        localdir = course.local_data.pdf_local
 
     filename_ = localdir + "/" + filename
     if not os.path.exists(filename_):
         print(f"{filename} does not exists in {localdir}")
         return None
 
-    # finding canvas folder
-    folders = course.get_folders()
-    if folder_name is None:
-        folder = folders[0]
-    else:
-        folders = [f for f in folders if f.name == folder_name]
-        folder = (
-            folders[0]
-            if folders
-            else course.get_folders()[0].create_folder(folder_name)
-        )
+    folder = _resolve_folder(course, folder_name)
 
     if (canvasname is not None) and filename != canvasname:
         with tempfile.TemporaryDirectory() as d:
@@ -99,34 +151,42 @@ def upload_pdf(  # type: ignore
     return folder.upload(filename_, on_duplicate="overwrite")
 
 
+def upload_pdfs(  # type: ignore
+    course: canvasapi.course.Course,
+    filenames: Sequence[str],
+    localdir: Optional[str] = None,
+    folder_name: Optional[str] = None,
+) -> List[Optional[canvasapi.file.File]]:
+    if localdir is None:
+        if folder_name is None:
+            folder_name = course.local_data.pdf_canvas
+        localdir = course.local_data.pdf_local
+    with ThreadPoolExecutor(max_workers=6) as ex:
+        return list(
+            ex.map(
+                lambda fn: upload_pdf(
+                    course, fn, localdir=localdir, folder_name=folder_name
+                ),
+                filenames,
+            )
+        )
+
+
 def file_upload(  # type: ignore
     course: canvasapi.course.Course,
     file: str,
     folder_name: Optional[str] = None,
 ) -> canvasapi.file.File:
-    folders = course.get_folders()
-    if folder_name is None:
-        folder = folders[0]
-    else:
-        folders = [f for f in folders if f.name == folder_name]
-        folder = (
-            folders[0]
-            if folders
-            else course.get_folders()[0].create_folder(folder_name)
-        )
+    folder = _resolve_folder(course, folder_name)
     return folder.upload(file, on_duplicate="overwrite")
 
 
 def get_file(course: canvasapi.course.Course, path: str) -> canvasapi.file.File:  # type: ignore
-    path_elements = path.split("/")
-    file_name = path_elements.pop()
-    path_elements = path_elements[::-1]
-    folders = course.get_folders()
-    while path_elements:
-        folders = folders[0].get_folders()
-        folder_name = path_elements.pop()
-        folders = [f for f in folders if f.name == folder_name]
-    return [f for f in folders[0].get_files() if f.display_name == file_name][0]
+    dirname, file_name = os.path.split(path)
+    full_name = "course files" + (f"/{dirname}" if dirname else "")
+    folder_by_name = {fld.full_name: fld for fld in _folders_of(course)}
+    folder = folder_by_name[full_name]
+    return [f for f in _files_of(folder) if f.display_name == file_name][0]
 
 
 def get_file_id(course: canvasapi.course.Course, path: str) -> int:  # type: ignore
@@ -137,29 +197,58 @@ def get_path(x: canvasapi.file.File) -> str:  # type: ignore
     return str(x.full_name).replace("course files", "")
 
 
-def file_key(course: canvasapi.course.Course, f: canvasapi.file.File) -> str:  # type: ignore
-    key = f"{course.get_folder(f.folder_id).full_name}/{f.display_name}"
+def prefetch_iter(iterable: Any, maxsize: int = 64) -> Generator[Any, None, None]:
+    """Iterate `iterable` on a background thread.
+
+    With a canvasapi PaginatedList this lets the next page download
+    while the caller processes the current items.
+    """
+    done = object()
+    items: queue.Queue = queue.Queue(maxsize=maxsize)
+
+    def fill() -> None:
+        try:
+            for item in iterable:
+                items.put((None, item))
+        except Exception as exc:  # re-raised on the consuming side
+            items.put((exc, None))
+        else:
+            items.put((None, done))
+
+    threading.Thread(target=fill, daemon=True).start()
+    while True:
+        exc, item = items.get()
+        if exc is not None:
+            raise exc
+        if item is done:
+            return
+        yield item
+
+
+def file_key(f: canvasapi.file.File, folder_by_id: Dict) -> str:  # type: ignore
+    key = f"{folder_by_id[f.folder_id].full_name}/{f.display_name}"
     return key.replace("course files/", "")
 
 
 def file_url_dict(course: canvasapi.course.Course) -> Dict:  # type: ignore
+    folder_by_id = {fld.id: fld for fld in _folders_of(course)}
     files = {
-        file_key(f, course): {
+        file_key(f, folder_by_id): {
             "course_id": course.id,
             "id": f.id,
             "url": download_url(course.id, f.id),
             "preview_url": preview_url(course.id, f.id),
         }
-        for f in course.get_files()
+        for f in prefetch_iter(course.get_files())
     }
-    for q in course.get_quizzes():
-        key = f"quiz/{q.title}"
-        if key in files:
-            print(
-                f"{key} is already present.\n"
-                f'Overwriting {files[key]["url"]} with {q.html_url}.'
-            )
-        files[key] = {"url": q.html_url}
+    quiz_entries = {f"quiz/{q.title}": {"url": q.html_url} for q in course.get_quizzes()}
+    overlap = files.keys() & quiz_entries.keys()
+    if overlap:
+        print(
+            f"{len(overlap)} key(s) already present, overwriting: "
+            f"{', '.join(sorted(overlap))}"
+        )
+    files.update(quiz_entries)
     return files
 
 
@@ -173,20 +262,17 @@ def download_url(course_id: str, file_id: str) -> str:
 
 def write_lua_table(d: Dict, dict_file: str = "file.dict") -> None:
     with open(dict_file, "w") as f:
-        f.write("return")
-        lua_table(d, f)
+        f.write("return" + lua_table(d))
 
 
-def lua_table(d: Dict, file: TextIO) -> None:
-    file.write("{\n")
+def lua_table(d: Dict) -> str:
+    parts = ["{\n"]
     for k, v in d.items():
-        file.write(f'["{k}"]=')
-        if isinstance(v, dict):
-            lua_table(v, file)
-        else:
-            file.write(repr(v))
-        file.write(",")
-    file.write("}\n")
+        parts.append(f'["{k}"]=')
+        parts.append(lua_table(v) if isinstance(v, dict) else repr(v))
+        parts.append(",")
+    parts.append("}\n")
+    return "".join(parts)
 
 
 def make_assignment(
@@ -198,20 +284,18 @@ def make_assignment(
     visibility: Any = None,
     root: str = "../",
     math: str = "mathml",
-    filters: Sequence[str] = ("href_filter"),
+    filters: Sequence[str] = ("href_filter",),
 ) -> Dict:
-    lua_filter = " ".join(f"--lua-filter {root}{x}.lua" for x in filters)
-    cmd = f"lua {root}extract.lua {fel} | {pandoc_cmd()} -f latex+raw_tex --{math} -t html {lua_filter}"
-    # --lua-filter {root}href_filter.lua"
-
-    out = subprocess.run(cmd, shell=True, capture_output=True)
-    if out.returncode != 0:
-        print("cmd:", cmd)
-        print("stdout:", out.stdout.decode("utf-8"))
-        print("stderr:", out.stderr.decode("utf-8"))
-        print("-" * 20)
+    pandoc = [pandoc_cmd(), "-f", "latex+raw_tex", f"--{math}", "-t", "html"]
+    for x in filters:
+        pandoc += ["--lua-filter", f"{root}{x}.lua"]
+    cmd = [["lua", f"{root}extract.lua", fel], pandoc]
+
+    # extract.lua reads `fel` itself, so the (command, stdin) disk cache
+    # cannot see content changes — run the pipeline uncached
+    html = _run_cmd_on_text(cmd, "")
+    if not html:
         return {}
-    html = out.stdout.decode("utf-8")
 
     htmls = html.split("----0123456789----\n")
     resources = [x.split("\n")[-2:] for x in htmls[:-1]]
@@ -255,15 +339,24 @@ def upload_resources(assgn: Dict, course: canvasapi.course.Course) -> Dict:  # t
 
 def update_front_page(course: canvasapi.course.Course, root: str = "../") -> canvasapi.course.Course:  # type: ignore
     index_md = course.config["index_local"]
-    cmd = (
-        f"cat  {index_md} |lua {root}preprocess_macros.lua"
-        f"|{pandoc_cmd()} --mathml -t html --lua-filter {root}href_filter.lua"
-    )
-    out = subprocess.run(cmd, shell=True, capture_output=True)
-    if out.returncode != 0:
-        print(out.stderr)
+    with open(index_md) as f:
+        text = f.read()
+    cmd = [
+        ["lua", f"{root}preprocess_macros.lua"],
+        [
+            pandoc_cmd(),
+            "--mathml",
+            "-t",
+            "html",
+            "--lua-filter",
+            f"{root}href_filter.lua",
+        ],
+    ]
+    # href_filter.lua rewrites links from the file.dict table, which is
+    # not part of the (command, stdin) cache key — run uncached
+    html = _run_cmd_on_text(cmd, text)
+    if not html:
         return
-    html = out.stdout.decode("utf-8")
     return course.edit_front_page(wiki_page={"title": "Kurzusleírás", "body": html})
 
 
@@ -285,32 +378,48 @@ def pandoc_quiz_data(data: List) -> List:
 
 
 def text_iter(data: List) -> Generator[Dict, None, None]:
-    for x in data:
-        if x.get("type", "") == "quiz":
+    stack = list(reversed(data))
+    while stack:
+        x = stack.pop()
+        kind = x.get("type", "")
+        if kind == "quiz":
             yield {"obj": x, "key": "description", "text": x["description"]}
-            yield from text_iter(x["questions"])
-        elif x.get("type", "") == "quizgroup":
-            for q in x["questions"]:
-                yield from question_iter(q)
+            stack.extend(reversed(x["questions"]))
+        elif kind == "quizgroup":
+            stack.extend(reversed(x["questions"]))
         elif x.get("question_type", None) is not None:
-            yield from question_iter(x)
-
-
-def question_iter(x: Dict) -> Generator[Dict, None, None]:
-    yield {"obj": x, "key": "question_text", "text": x["question_text"]}
-    if x["question_type"] in pandoc_ans:
-        for a in x["answers"]:
-            yield from answer_iter(a)
-
-
-def answer_iter(x: Dict) -> Generator[Dict, None, None]:
-    yield {"obj": x, "key": "answer_html", "text": x.pop("answer_text", "")}
+            yield {"obj": x, "key": "question_text", "text": x["question_text"]}
+            if x["question_type"] in pandoc_ans:
+                for a in x["answers"]:
+                    yield {
+                        "obj": a,
+                        "key": "answer_html",
+                        "text": a.pop("answer_text", ""),
+                    }
+
+
+def _create_question(quiz: Any, question: Dict, retries: int = 3) -> Any:
+    """Upload one question, backing off when Canvas throttles the request."""
+    delay = 1.0
+    for attempt in range(retries):
+        try:
+            return quiz.create_question(question=question)
+        except canvasapi.exceptions.Forbidden:
+            if attempt == retries - 1:
+                raise
+            time.sleep(delay)
+            delay *= 2
+    return None
 
 
 def copy_dict(d: Dict, pred: Callable) -> Dict:
     return {k: v for k, v in d.items() if pred(k)}
 
 
+# C-level predicate shared by the copy_dict calls in create_quiz
+_NOT_QUESTIONS = "questions".__ne__
+
+
 def all_questions(lst: List) -> Generator[Dict, None, None]:
     for x in lst:
         if "questions" in x:
@@ -330,20 +439,34 @@ def create_quiz(course: canvasapi.course.Course, data: List, progress: Optional[
         for x in data:
             if x.get("type", "") != "quiz":
                 continue
-            quiz = course.create_quiz(quiz=copy_dict(x, lambda k: k != "questions"))
+            quiz = course.create_quiz(quiz=copy_dict(x, _NOT_QUESTIONS))
             q_groups = [x for x in x["questions"] if x.get("type", "") == "quizgroup"]
-            for q_group in tqdm_(q_groups, desc="creating groups", file=dev_null):
+
+            def add_group(q_group: Dict) -> None:
                 q_id = quiz.create_question_group(
-                    quiz_groups=[copy_dict(q_group, lambda k: k != "questions")]
+                    quiz_groups=[copy_dict(q_group, _NOT_QUESTIONS)]
                 ).id
                 for q in q_group["questions"]:
                     q["quiz_group_id"] = q_id
-            for q in tqdm_(
-                list(all_questions(x["questions"])),
-                desc="creating questions",
-                file=dev_null,
-            ):
-                quiz.create_question(question=q)
+
+            questions = list(all_questions(x["questions"]))
+            with ThreadPoolExecutor(max_workers=8) as ex:
+                list(
+                    tqdm_(
+                        ex.map(add_group, q_groups),
+                        total=len(q_groups),
+                        desc="creating groups",
+                        file=dev_null,
+                    )
+                )
+                list(
+                    tqdm_(
+                        ex.map(lambda q: _create_question(quiz, q), questions),
+                        total=len(questions),
+                        desc="creating questions",
+                        file=dev_null,
+                    )
+                )
             points_total = sum(
                 q.get("question_points", q.get("points_possible", 0))
                 for q in x["questions"]
@@ -362,7 +485,8 @@ def mk_ans(x: Dict, i: int, use_pandoc: bool = True) -> Dict:
     a = {}
     a["answer_weight"] = x["weight"]
     if use_pandoc:
-        a["answer_html"] = pandoc_text(x["text"], src_format="latex")
+        # raw latex; mk_quiz converts every fragment in one pandoc run
+        a["answer_html"] = x["text"]
     else:
         a["answer_text"] = x["text"]
     a["blank_id"] = x["blank_id"][1:-1] if "blank_id" in x else None
@@ -372,7 +496,6 @@ def mk_ans(x: Dict, i: int, use_pandoc: bool = True) -> Dict:
 def mk_question_dict(q: Dict, qg_id: Optional[str] = None) -> Dict:
     d = {k: v for k, v in q.items() if k in qargs}
     d["quiz_group_id"] = qg_id
-    d["question_text"] = pandoc_text(d["question_text"], src_format="latex")
     use_pandoc = d["question_type"] in pandoc_ans
     d["answers"] = [
         mk_ans(x, i + 1, use_pandoc) for i, x in enumerate(q.get("answers", []))
@@ -381,9 +504,7 @@ def mk_question_dict(q: Dict, qg_id: Optional[str] = None) -> Dict:
 
 
 def mk_quiz_dict(q: Dict) -> Dict:
-    q0 = q.copy()
-    q0["description"] = pandoc_text(q["description"], src_format="latex")
-    return q0
+    return q.copy()
 
 
 def set_points(x: Dict) -> None:
@@ -392,21 +513,38 @@ def set_points(x: Dict) -> None:
 
 
 def mk_quiz(qdata: Dict, course: canvasapi.course.Course) -> Any:  # type: ignore
-    quiz = course.create_quiz(quiz=mk_quiz_dict(qdata))
-    for q in tqdm(qdata["questions"]):
+    quiz_dict = mk_quiz_dict(qdata)
+    groups = []
+    for q in qdata["questions"]:
         if q["type"] == "quizgroup":
-            quizgroup = quiz.create_question_group(
-                quiz_groups=[{k: v for k, v in q.items() if k in qgargs}]
-            )
-            for q0 in q["questions"]:
-                quiz.create_question(question=mk_question_dict(q0, quizgroup.id))
+            group = {k: v for k, v in q.items() if k in qgargs}
+            questions = [mk_question_dict(q0) for q0 in q["questions"]]
+            groups.append((group, questions))
+
+    # one pandoc run over every latex fragment of the quiz
+    items = [(quiz_dict, "description")]
+    for _, questions in groups:
+        for d in questions:
+            items.append((d, "question_text"))
+            for a in d["answers"]:
+                if "answer_html" in a:
+                    items.append((a, "answer_html"))
+    htmls = pandoc_list([obj[key] for obj, key in items], src_format="latex")
+    for (obj, key), html in zip(items, htmls):
+        obj[key] = html
+
+    quiz = course.create_quiz(quiz=quiz_dict)
+    with ThreadPoolExecutor(max_workers=8) as ex:
+        for group, questions in tqdm(groups):
+            quizgroup = quiz.create_question_group(quiz_groups=[group])
+            for d in questions:
+                d["quiz_group_id"] = quizgroup.id
+            list(ex.map(lambda d: _create_question(quiz, d), questions))
     return quiz
 
 
 def get_json_data(json_file: str) -> List:
-    with open(json_file) as f:
-        txt = "".join(f.readlines())
-        data = json.loads(txt)
+    data = _json.load_path(json_file)
 
     sdata = []
     for x in data:
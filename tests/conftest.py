@@ -0,0 +1,132 @@
+import pytest
+
+
+@pytest.fixture
+def tmp_working_dir(tmp_path, monkeypatch):  # type: ignore
+    """Run the test in a fresh temporary directory.
+
+    monkeypatch.chdir restores the old cwd per test, so tests stay
+    isolated under parallel runners as well.
+    """
+    monkeypatch.chdir(tmp_path)
+    return str(tmp_path)
+
+
+SECTION_FORMATS = {
+    "canvas": """
+\\documentclass[ucsb]{{ltxgy}}
+\\useluatrue
+\\letszam{{{letszam}}}
+\\csoportnev{{{short_name}}}
+\\begin{{document}}
+    %\\def\\theenumfel{{\\realenumfel}}
+    \\newpage
+    \\nodue
+    \\def\\hw#1 #2{{#2. heti feladatsor}}
+    \\feladat{{f}}
+    \\def\\PEfont{{\\mathbb}}
+
+    \\begin{{gy}}{{{week}}}{{{date}}}
+        \\exercises[\\withoutsol]{{{exs}}}
+    \\end{{gy}}
+    \\vfill
+\\end{{document}}
+%%%%%% Local Variables:
+%%%%%% mode: latex
+%%%%%% TeX-master: t
+%%%%%% End:
+""",
+    "paper": """
+\\documentclass[onpaper]{{ltxgy}}
+\\useluatrue
+\\letszam{{{letszam}}}
+\\csoportnev{{{short_name}}}
+\\begin{{document}}
+    %\\def\\theenumfel{{\\realenumfel}}
+    \\feladat{{f}}
+    \\def\\PEfont{{\\mathbb}}
+
+    \\begin{{gy}}{{{week}}}{{{date}}}
+        \\exercises[\\withoutsol]{{{exs}}}
+    \\end{{gy}}
+    \\vfill
+\\end{{document}}
+%%%%%% Local Variables:
+%%%%%% mode: latex
+%%%%%% TeX-master: t
+%%%%%% End:
+""",
+}
+
+TEST_YAML = """
+---
+Első óra: 2022-09-15
+Utolsó óra: 2022-12-16
+Csoport: Valószínűségszámítás II gyakorlat
+időpont: Csütörtök 12.00-13.30
+Szünetek: [2022-09-22, 2022-10-29]
+rovidnev:
+    paper: valszám2
+    canvas: Val. szám. II gyak.
+letszam: 10
+
+course_id: 28654
+pdf_local: ../
+pdf_canvas: problems
+index_local: mat3.md
+
+let:
+    hf:
+        prefix: ""
+    extra:
+        prefix: "A feladat megoldása 4 pontot ér."
+
+
+description: |
+    A szokásostól eltérően zárthelyi dolgozatok nem lesznek.
+    **A gyakorlati jegy a házi feladat megoldások eredményén fog alapulni.**
+
+    A házi és szorgalmi feladatok a kurzuson belül a [`Feladatok`](course:assignments) fül alatt érhető el.
+
+---
+
+# 1.gyak 09.15.
+description: |
+    Analízis limesz tételeinek és a Fubini tétel alkalmazása.
+feladatok: |
+    2524
+    1129 1146[a]
+
+hf: 1331 1413 2073
+
+extra: 1146[b] 1316 1304 1121 1122
+
+not used: |
+    2521 2389  1126 1147  1381 2388
+    1127 1145 1403
+---
+# 2.gyak 09.16.
+
+feladatok: |
+    1521 1127 398[a] 270 1182[abcdef]
+    2375 1169
+
+hf: 1473  1176[ae]
+extra: 2488 1174[b]
+későbbre:  522 523 1167 2521 2389 1910
+not used: |
+    1169 1910 ## 2126 2371 1153 1154 870
+    136 270 398[a]
+...
+## any comment here is junk
+"""
+
+
+@pytest.fixture
+def section_formats():  # type: ignore
+    return SECTION_FORMATS
+
+
+@pytest.fixture
+def test_yaml():  # type: ignore
+    return TEST_YAML
@@ -27,7 +27,7 @@ def test_result_to_canvasfs() -> None:
             logger.info("test_result_to_canvas_fs in %s", tmp)
             type(cfs).__dict__["files"]
             cfs.reset()
-            assert "_files" not in cfs.__dict__
+            assert "files" not in cfs.__dict__
 
             def dummy(key: str) -> int:
                 logger.info("dummy(%s)", key)
@@ -40,7 +40,7 @@ def test_result_to_canvasfs() -> None:
             keys = ["a/b/c", "d/e"]
             for k in keys:
                 dummy(k)
-            assert cfs.__dict__["_files"] == {k: dummy(k) for k in keys}
+            assert cfs.__dict__["files"] == {k: dummy(k) for k in keys}
 
 
 def test_load() -> None:
@@ -65,10 +65,12 @@ def test_load() -> None:
             file_names = {
                 name: type(cfs).__dict__[name]._filename for name in cfs._fields
             }
-            for name, filename in file_names.items():
-                with open(os.path.abspath(filename)) as f:
-                    assert os.path.dirname(f.name) == tmp
-                    assert json.load(f) == getattr(cfs, name)
+            with open(os.path.abspath(file_names["files"])) as f:
+                assert os.path.dirname(f.name) == tmp
+                assert json.load(f) == cfs.files
+            # the untouched dicts were not written out
+            for name in ("assignments", "quizzes"):
+                assert not os.path.exists(file_names[name])
 
 
 @pytest.fixture
@@ -113,7 +115,7 @@ def mock_course(monkeypatch: pytest.MonkeyPatch) -> None:
 
     monkeypatch.setattr(Course, "get_folders", get_folders)
 
-    def get_files(self: Folder) -> list:  # type: ignore
+    def get_files(self: Course) -> list:  # type: ignore
         return [
             CanvasObject(
                 None,
@@ -129,7 +131,7 @@ def mock_course(monkeypatch: pytest.MonkeyPatch) -> None:
             )
         ]
 
-    monkeypatch.setattr(Folder, "get_files", get_files)
+    monkeypatch.setattr(Course, "get_files", get_files)
 
 
 def test_get_canvas_quizzes(mock_course) -> None:  # type: ignore